@@ -1,5 +1,6 @@
 import bpy
 from bpy.props import (
+        BoolProperty,
         CollectionProperty,
         EnumProperty,
         FloatProperty,
@@ -34,12 +35,14 @@ if __name__ in sys.modules:
         import_module(module_name)
         print(f"Reloaded module: {module_name}")
 
+from .steps import ModalSteps
+
 
 VERSION1_GAMES = "-Scooby-Doo: Night of 100 Frights\n-SpongeBob SquarePants: Battle for Bikini Bottom\n-The SpongeBob SquarePants Movie\n-The Incredibles"
 VERSION2_GAMES = "-The Incredibles: Rise of The Underminer\n-Ratatouille Prototype"
 
 
-class ImportEvilAnm(bpy.types.Operator, ImportHelper):
+class ImportEvilAnm(bpy.types.Operator, ImportHelper, ModalSteps):
     bl_idname = "import_scene.evil_anm"
     bl_label = "Import Animation"
     bl_description = "Imports a binary evilengine animation file (SKB1)"
@@ -66,18 +69,22 @@ class ImportEvilAnm(bpy.types.Operator, ImportHelper):
 
     files: CollectionProperty(type=bpy.types.PropertyGroup)
 
+    progress_text = "Importing animation"
+    progress_unit = "files"
+
     def execute(self, context):
         from . import import_evil_anm
 
         files_dir = Path(self.filepath)
+        file_paths = []
         for selection in self.files:
             file_path = Path(files_dir.parent, selection.name)
             if file_path.suffix.lower() == self.filename_ext:
-                import_evil_anm.load(context, file_path, self.fps, self.version)
-        return {'FINISHED'}
+                file_paths.append(file_path)
+        return self.run_modal(context, import_evil_anm.iter_load_files(context, file_paths, self.fps, self.version))
 
 
-class ExportEvilAnm(bpy.types.Operator, ExportHelper):
+class ExportEvilAnm(bpy.types.Operator, ExportHelper, ModalSteps):
     bl_idname = "export_scene.evil_anm"
     bl_label = "Export Animation"
     bl_description = "Exports a binary evilengine animation file (SKB1)"
@@ -117,10 +124,24 @@ class ExportEvilAnm(bpy.types.Operator, ExportHelper):
         default=0,
     )
 
+    selected_armatures: BoolProperty(
+        name="All Selected Armatures",
+        description="Export every selected armature to its own file named after the armature, sampling the timeline once. "
+                    "The typed file name is ignored, only its folder is used, and existing files there are overwritten",
+        default=False,
+    )
+
+    progress_text = "Exporting animation"
+    progress_unit = "frames"
+
     def execute(self, context):
         from . import export_evil_anm
 
-        return export_evil_anm.save(context, self.filepath, self.fps, self.flags, self.endian, self.version)
+        if self.selected_armatures:
+            steps = export_evil_anm.iter_save_selected(context, self.filepath, self.fps, self.flags, self.endian, self.version)
+        else:
+            steps = export_evil_anm.iter_save(context, self.filepath, self.fps, self.flags, self.endian, self.version)
+        return self.run_modal(context, steps)
     
 def menu_func_import(self, context):
     self.layout.operator(ImportEvilAnm.bl_idname,
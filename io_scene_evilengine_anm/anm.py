@@ -60,6 +60,11 @@ class Anim_V1:
     def open(cls, path):
         with FileReader(path, "rb") as file:
             return cls.read(file)
+
+    @classmethod
+    def from_bytes(cls, data):
+        with BytesReader(data) as file:
+            return cls.read(file)
         
     def write(self, file):
         magic = "1BKS" if file.endian == ">" else "SKB1"
@@ -162,6 +167,11 @@ class Anim_V2:
     def open(cls, path):
         with FileReader(path, "rb") as file:
             return cls.read(file)
+
+    @classmethod
+    def from_bytes(cls, data):
+        with BytesReader(data) as file:
+            return cls.read(file)
         
     def write(self, file):
         magic = "1BKS" if file.endian == ">" else "SKB1"
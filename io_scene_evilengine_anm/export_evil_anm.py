@@ -1,7 +1,9 @@
 import bpy
 from dataclasses import dataclass
+from pathlib import Path
 from mathutils import Quaternion, Vector
 from .anm import Anim_V1, Keyframe, Anim_V2, Keyframe_V2
+from .steps import run_steps
 
 
 def invalid_active_object(self, context):
@@ -12,6 +14,12 @@ def missing_action(self, context):
     self.layout.label(text='No action for active armature. Nothing to export')
 
 
+def missing_armature_actions(arm_names):
+    def draw(self, context):
+        self.layout.label(text='No action for armatures, skipped: ' + ', '.join(arm_names))
+    return draw
+
+
 @dataclass
 class PoseBoneTransform:
     pos: Vector
@@ -51,95 +59,140 @@ def get_action_range(arm_obj, act):
                 frame_start = min(frame_start, time)
                 frame_end = max(frame_end, time)
 
+    if frame_start is None:
+        return None, None
+
     return int(frame_start), round(frame_end)
     
 
-def has_keyframe(action, bone, frame_number):
+def get_keyframe_frames(action, bone):
+    frames = set()
     for fcurve in action.fcurves:
         if bone.name in fcurve.data_path:
-            for keyframe in fcurve.keyframe_points:
-                if int(keyframe.co.x) == frame_number:
-                    return True
-    return False
+            frames.update(int(keyframe.co.x) for keyframe in fcurve.keyframe_points)
+    return frames
+
+
+class AnmSampler:
+    def __init__(self, arm_obj, act):
+        self.arm_obj = arm_obj
+        self.act = act
+        self.frame_start, self.frame_end = get_action_range(arm_obj, act)
+        self.bone_transforms = {}
+        self.has_keyframe_dict = {}
+        self.times = []
+
+        # Keyed frames per bone, collected once instead of scanning the fcurves on every frame
+        self.bone_keyed_frames = [get_keyframe_frames(act, bone) for bone in arm_obj.pose.bones]
+        self.keyed_frames = set()
+        if self.frame_start is not None:
+            self.keyed_frames = {
+                frame for frames in self.bone_keyed_frames for frame in frames
+                if self.frame_start <= frame <= self.frame_end
+            }
+
+    def sample(self, frame):
+        if frame not in self.keyed_frames:
+            return
+
+        time = frame - self.frame_start
+        self.has_keyframe_dict[time] = [frame in frames for frames in self.bone_keyed_frames]
+
+        for bone_id, pose_bone in enumerate(self.arm_obj.pose.bones):
+            self.bone_transforms.setdefault(bone_id, []).append(get_bone_transform(pose_bone))
+
+        self.times.append(time)
+
+    def create_anm(self, fps, flags, version):
+        if not self.times:
+            return None
+
+        keyframes, translate = [], []
+        offsets = [[] for _ in self.times]
+        times = self.times
+
+        for bone_id, transforms in sorted(self.bone_transforms.items()):
+            bone = self.arm_obj.data.bones[bone_id]
+
+            loc_mat = bone.matrix_local.copy()
+            if bone.parent:
+                loc_mat = bone.parent.matrix_local.inverted_safe() @ loc_mat
+
+            for time_id, (frame, trans) in enumerate(zip(times, transforms)):
+                if bone.name == "unnamed" and 0 < time_id < len(transforms)-1:
+                    offsets[time_id].append(len(keyframes) - 1)
+                    continue
+
+                if time_id == 0 or time_id == len(transforms)-1 or self.has_keyframe_dict[frame][bone_id]:
+                    kf_pos, kf_rot = trans.calc_kf(loc_mat)
+                    if version == "1":
+                        keyframes.append(Keyframe(time_id, kf_rot, kf_pos))
+                    elif version == "2":
+                        if kf_pos not in translate:
+                            translate.append(kf_pos)
+                        keyframes.append(Keyframe_V2(frame, translate.index(kf_pos), kf_rot))
+                offsets[time_id].append(len(keyframes) - 1)
 
+        offsets.pop()
 
-def create_anm(context, arm_obj, act, fps, flags, version):
-    offsets, keyframes, times, translate = [], [], [], []
+        if version == "1":
+            return Anim_V1(flags, keyframes, [t / fps for t in times], offsets)
+        elif version == "2":
+            return Anim_V2(keyframes, list(times), translate, offsets)
 
-    old_frame = context.scene.frame_current
-    frame_start, frame_end = get_action_range(arm_obj, act)
-    bone_transforms = {}
 
-    if frame_start is None:
-        return None
+def iter_sweep_frames(context, samplers):
+    # Only frames where at least one armature has a key need a depsgraph update
+    frames = sorted(set().union(*(s.keyed_frames for s in samplers)))
+    if not frames:
+        return context
 
-    context.scene.frame_set(frame_start)
-    context.view_layer.update()
+    scene, view_layer = context.scene, context.view_layer
+    old_frame = scene.frame_current
 
-    has_keyframe_dict = {}
-    for frame in range(frame_start, frame_end+1):
-        context.scene.frame_set(frame)
-        context.view_layer.update()
+    try:
+        for frame_id, frame in enumerate(frames):
+            scene.frame_set(frame)
+            view_layer.update()
 
-        has_keyframe_dict[frame] = [has_keyframe(act, bone, frame) for bone in arm_obj.pose.bones]
-        if not any(has_keyframe_dict[frame]):
-            continue
+            for sampler in samplers:
+                sampler.sample(frame)
 
-        for bone_id, pose_bone in enumerate(arm_obj.pose.bones):
-            if frame == frame_start:
-                bone_transforms[bone_id] = [get_bone_transform(pose_bone)]
-            else:
-                bone_transforms[bone_id].append(get_bone_transform(pose_bone))
+            context = yield frame_id + 1, len(frames)
+    finally:
+        # Also restores the frame when the sweep is cancelled
+        scene.frame_set(old_frame)
+        view_layer.update()
 
-        offsets.append([])
-        times.append(frame - frame_start)    
+    return context
 
-    for bone_id, transforms in sorted(bone_transforms.items()):
-        bone = arm_obj.data.bones[bone_id]
 
-        loc_mat = bone.matrix_local.copy()
-        if bone.parent:
-            loc_mat = bone.parent.matrix_local.inverted_safe() @ loc_mat
-
-        for time_id, (frame, trans) in enumerate(zip(times, transforms)):
-            if bone.name == "unnamed" and 0 < time_id < len(transforms)-1:
-                offsets[time_id].append(len(keyframes) - 1)
-                continue
-
-            if time_id == 0 or time_id == len(transforms)-1 or has_keyframe_dict[frame][bone_id]:
-                kf_pos, kf_rot = trans.calc_kf(loc_mat)             
-                if version == "1":
-                    keyframes.append(Keyframe(time_id, kf_rot, kf_pos))
-                elif version == "2":
-                    if kf_pos not in translate:
-                        translate.append(kf_pos)
-                    keyframes.append(Keyframe_V2(frame, translate.index(kf_pos), kf_rot))            
-            offsets[time_id].append(len(keyframes) - 1)
+def create_anm(context, arm_obj, act, fps, flags, version):
+    sampler = AnmSampler(arm_obj, act)
+    run_steps(context, iter_sweep_frames(context, [sampler]))
+    return sampler.create_anm(fps, flags, version)
 
-    offsets.pop()
-    context.scene.frame_set(old_frame)
-    context.view_layer.update()
 
-    if version == "1":
-        return Anim_V1(flags, keyframes, [t / fps for t in times], offsets)
-    elif version == "2":
-        return Anim_V2(keyframes, times, translate, offsets)
+def get_armature_action(arm_obj):
+    animation_data = arm_obj.animation_data
+    if animation_data:
+        return animation_data.action
+    return None
 
 
-def save(context, filepath, fps, flags, endian, version):
+def iter_save(context, filepath, fps, flags, endian, version):
     arm_obj = context.view_layer.objects.active
     if not arm_obj or type(arm_obj.data) != bpy.types.Armature:
         context.window_manager.popup_menu(invalid_active_object, title='Error', icon='ERROR')
         return {'CANCELLED'}
 
-    act = None
-    animation_data = arm_obj.animation_data
-    if animation_data:
-        act = animation_data.action
+    act = get_armature_action(arm_obj)
 
     anm = None
     if act:
-        anm = create_anm(context, arm_obj, act, fps, flags, version)
+        sampler = AnmSampler(arm_obj, act)
+        context = yield from iter_sweep_frames(context, [sampler])
+        anm = sampler.create_anm(fps, flags, version)
 
     if not anm:
         context.window_manager.popup_menu(missing_action, title='Error', icon='ERROR')
@@ -148,3 +201,58 @@ def save(context, filepath, fps, flags, endian, version):
     anm.save(filepath, endian)
 
     return {'FINISHED'}
+
+
+def save(context, filepath, fps, flags, endian, version):
+    return run_steps(context, iter_save(context, filepath, fps, flags, endian, version))
+
+
+def get_unique_file_names(names):
+    # Different armature names can clean to the same file name (Rig.L, Rig_L)
+    used_names, unique_names = set(), []
+    for name in names:
+        unique_name, num = name, 1
+        while unique_name.lower() in used_names:
+            unique_name = f"{name}_{num:03}"
+            num += 1
+        used_names.add(unique_name.lower())
+        unique_names.append(unique_name)
+    return unique_names
+
+
+def iter_save_selected(context, filepath, fps, flags, endian, version):
+    arm_objs = [obj for obj in context.selected_objects if type(obj.data) == bpy.types.Armature]
+    if not arm_objs:
+        context.window_manager.popup_menu(invalid_active_object, title='Error', icon='ERROR')
+        return {'CANCELLED'}
+
+    samplers, skipped_names = [], []
+    for arm_obj in arm_objs:
+        act = get_armature_action(arm_obj)
+        if act:
+            samplers.append(AnmSampler(arm_obj, act))
+        else:
+            skipped_names.append(arm_obj.name)
+
+    # One timeline sweep for every armature instead of one per armature
+    context = yield from iter_sweep_frames(context, samplers)
+
+    directory = Path(filepath).parent
+    file_names = get_unique_file_names([bpy.path.clean_name(s.arm_obj.name) for s in samplers])
+    exported = 0
+    for sampler, file_name in zip(samplers, file_names):
+        anm = sampler.create_anm(fps, flags, version)
+        if not anm:
+            skipped_names.append(sampler.arm_obj.name)
+            continue
+        anm.save(Path(directory, file_name + ".anm"), endian)
+        exported += 1
+
+    if not exported:
+        context.window_manager.popup_menu(missing_armature_actions(skipped_names), title='Error', icon='ERROR')
+        return {'CANCELLED'}
+
+    if skipped_names:
+        context.window_manager.popup_menu(missing_armature_actions(skipped_names), title='Warning', icon='INFO')
+
+    return {'FINISHED'}
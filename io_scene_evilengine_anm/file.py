@@ -1,19 +1,11 @@
 import io
 import struct
 
-__all__ = ["FileReader", "Quantize", "Dequantize"]
+__all__ = ["FileReader", "BytesReader", "Quantize", "Dequantize"]
 
-class FileReader(io.FileIO):
-    def __init__(self, filepath: str, mode: str, endian: str = ">"):
-        super().__init__(filepath, mode)
-        self.endian = endian
-
-    def __enter__(self):
-        return self
+class BinaryStream:
+    endian: str
 
-    def __exit__(self, exc_type, exc_value, exc_traceback):
-        self.close()
-        
     def read_int(self, num: int = 1, signed: bool = False) -> int | tuple[int]:
         value = struct.unpack("%s%d%s" % (self.endian, num, "i" if signed else "I"), self.read(4*num))
         return value[0] if num == 1 else value
@@ -39,6 +31,24 @@ class FileReader(io.FileIO):
         self.write(struct.pack("%s%df" % (self.endian, len(data)), *data))
 
 
+class FileReader(BinaryStream, io.FileIO):
+    def __init__(self, filepath: str, mode: str, endian: str = ">"):
+        super().__init__(filepath, mode)
+        self.endian = endian
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+
+class BytesReader(BinaryStream, io.BytesIO):
+    def __init__(self, data: bytes, endian: str = ">"):
+        super().__init__(data)
+        self.endian = endian
+
+
 def Clamp16(value: int) -> int:
     return max(min(value, 32767), -32768)
 
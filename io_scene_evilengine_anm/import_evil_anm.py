@@ -1,4 +1,6 @@
 import bpy
+from array import array
+from hashlib import sha1
 from mathutils import Matrix
 from os import path
 from .anm import Anim_V1, Anim_V2, InvalidAnimation
@@ -23,14 +25,22 @@ def set_keyframe(curves, frame, values):
         c.keyframe_points[-1].interpolation = 'LINEAR'
 
 
+def reset_pose(arm_obj):
+    for pose_bone in arm_obj.pose.bones:
+        pose_bone.rotation_mode = 'QUATERNION'
+        pose_bone.location = (0, 0, 0)
+        pose_bone.rotation_quaternion = (1, 0, 0, 0)
+
+
 def create_action(arm_obj, anm, fps, version):
     act = bpy.data.actions.new('action')
     curves_loc, curves_rot = [], []
     loc_mats, prev_rots = {}, {}
 
+    reset_pose(arm_obj)
+
     for pose_bone in arm_obj.pose.bones:
         act.groups.new(pose_bone.name)
-        pose_bone.rotation_mode = 'QUATERNION'
 
         curves_loc.append([
             act.fcurves.new(
@@ -48,9 +58,6 @@ def create_action(arm_obj, anm, fps, version):
             ) for rot in range(4)
         ])
 
-        pose_bone.location = (0, 0, 0)
-        pose_bone.rotation_quaternion = (1, 0, 0, 0)
-
         bone = arm_obj.data.bones.get(pose_bone.name)
         loc_mat = bone.matrix_local.copy()
         if bone.parent:
@@ -100,23 +107,83 @@ def create_action(arm_obj, anm, fps, version):
 
     return act
 
+
+IMPORT_KEY_PROP = "evil_anm_import_key"
+IMPORT_CHECKSUM_PROP = "evil_anm_import_checksum"
+IMPORT_BONES_PROP = "evil_anm_import_bones"
+
+
+def get_rig_fingerprint(arm_obj):
+    rig_hash = sha1()
+    for bone in arm_obj.data.bones:
+        parent_name = bone.parent.name if bone.parent else ""
+        # + 0.0 turns -0.0 into 0.0 so equal rest poses always print the same
+        matrix = tuple(round(v, 5) + 0.0 for row in bone.matrix_local for v in row)
+        rig_hash.update(f"{bone.name}|{parent_name}|{matrix};".encode())
+    return rig_hash.hexdigest()
+
+
+def get_import_key(arm_obj, data, fps, version):
+    # Version 2 stores frame numbers, so fps does not affect the imported action
+    settings = f"{fps}:{version}" if version == "1" else version
+    return f"{sha1(data).hexdigest()}:{settings}:{get_rig_fingerprint(arm_obj)}"
+
+
+def get_action_checksum(act):
+    act_hash = sha1()
+    for fcu in act.fcurves:
+        co = array('f', [0.0]) * (len(fcu.keyframe_points) * 2)
+        fcu.keyframe_points.foreach_get('co', co)
+        act_hash.update(f"{fcu.data_path}|{fcu.array_index};".encode())
+        act_hash.update(co.tobytes())
+    return act_hash.hexdigest()
+
+
+def find_cached_action(import_key, name):
+    # Duplicated actions keep the custom properties, so skip copies whose keys were edited
+    # and prefer the one still carrying the imported name
+    cached_actions = [
+        act for act in bpy.data.actions
+        if act.get(IMPORT_KEY_PROP) == import_key and act.get(IMPORT_CHECKSUM_PROP) == get_action_checksum(act)
+    ]
+    for act in cached_actions:
+        if act.name == name:
+            return act
+    return cached_actions[0] if cached_actions else None
+
+
 def load(context, filepath, fps, version):
     arm_obj = context.view_layer.objects.active
     if not arm_obj or type(arm_obj.data) != bpy.types.Armature:
         context.window_manager.popup_menu(invalid_active_object, title='Error', icon='ERROR')
         return {'CANCELLED'}
 
-    try:
-        if version == "1":
-            anm = Anim_V1.open(filepath)
-        elif version == "2":
-            anm = Anim_V2.open(filepath)
-    except InvalidAnimation:
-        context.window_manager.popup_menu(invalid_file_format, title='Error', icon='ERROR')
-        return {'CANCELLED'}
+    return load_armature(context, arm_obj, filepath, fps, version)
 
-    arm_bones_num, anm_bones_num = len(arm_obj.pose.bones), len(anm.offsets[0])
-    if arm_bones_num != anm_bones_num:
+
+def load_armature(context, arm_obj, filepath, fps, version):
+    with open(filepath, "rb") as file:
+        data = file.read()
+
+    # Reuse the action of a previous import of the same file with the same settings and rig
+    import_key = get_import_key(arm_obj, data, fps, version)
+    act = find_cached_action(import_key, path.basename(filepath))
+
+    if not act:
+        try:
+            if version == "1":
+                anm = Anim_V1.from_bytes(data)
+            elif version == "2":
+                anm = Anim_V2.from_bytes(data)
+        except InvalidAnimation:
+            context.window_manager.popup_menu(invalid_file_format, title='Error', icon='ERROR')
+            return {'CANCELLED'}
+
+        anm_bones_num = len(anm.offsets[0])
+    else:
+        anm_bones_num = act.get(IMPORT_BONES_PROP, len(arm_obj.pose.bones))
+
+    if len(arm_obj.pose.bones) != anm_bones_num:
         context.window_manager.popup_menu(bones_number_mismatch, title='Error', icon='ERROR')
 
     animation_data = arm_obj.animation_data
@@ -125,8 +192,14 @@ def load(context, filepath, fps, version):
 
     bpy.ops.object.mode_set(mode='POSE')
 
-    act = create_action(arm_obj, anm, fps, version)
-    act.name = path.basename(filepath)
+    if act:
+        reset_pose(arm_obj)
+    else:
+        act = create_action(arm_obj, anm, fps, version)
+        act.name = path.basename(filepath)
+        act[IMPORT_KEY_PROP] = import_key
+        act[IMPORT_CHECKSUM_PROP] = get_action_checksum(act)
+        act[IMPORT_BONES_PROP] = anm_bones_num
     animation_data.action = act
 
     context.scene.render.fps = 30
@@ -142,3 +215,41 @@ def load(context, filepath, fps, version):
     bpy.ops.object.mode_set(mode='OBJECT')
 
     return {'FINISHED'}
+
+
+def iter_load_files(context, filepaths, fps, version):
+    arm_obj = context.view_layer.objects.active
+    if not arm_obj or type(arm_obj.data) != bpy.types.Armature:
+        context.window_manager.popup_menu(invalid_active_object, title='Error', icon='ERROR')
+        return {'CANCELLED'}
+
+    scene = context.scene
+    old_action = arm_obj.animation_data.action if arm_obj.animation_data else None
+    old_scene_settings = scene.frame_start, scene.frame_end, scene.render.fps
+    old_pose = [
+        (pose_bone.rotation_mode, pose_bone.location.copy(), pose_bone.rotation_quaternion.copy())
+        for pose_bone in arm_obj.pose.bones
+    ]
+
+    existing_actions = set(bpy.data.actions)
+    completed = False
+    try:
+        for file_id, filepath in enumerate(filepaths):
+            load_armature(context, arm_obj, filepath, fps, version)
+            context = yield file_id + 1, len(filepaths)
+        completed = True
+    finally:
+        if not completed:
+            # Roll back the files imported before cancelling. Every action that did not exist
+            # before is removed, including one left behind by a failing load_armature call.
+            if arm_obj.animation_data:
+                arm_obj.animation_data.action = old_action
+            for act in [act for act in bpy.data.actions if act not in existing_actions]:
+                bpy.data.actions.remove(act)
+            for pose_bone, (rotation_mode, location, rotation) in zip(arm_obj.pose.bones, old_pose):
+                pose_bone.rotation_mode = rotation_mode
+                pose_bone.location = location
+                pose_bone.rotation_quaternion = rotation
+            scene.frame_start, scene.frame_end, scene.render.fps = old_scene_settings
+
+    return {'FINISHED'}
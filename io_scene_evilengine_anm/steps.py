@@ -0,0 +1,119 @@
+from time import perf_counter
+
+__all__ = ["run_steps", "ModalSteps"]
+
+
+# Work generators yield (done, total) after each unit of work and receive the
+# current context back, because a context must not be kept between operator calls.
+# Their return value is the operator result set.
+
+def run_steps(context, steps):
+    try:
+        next(steps)
+        while True:
+            steps.send(context)
+    except StopIteration as e:
+        return e.value
+
+
+# Events that only navigate the view or keep windows alive. Everything else is swallowed
+# while running, so undo or scene edits cannot invalidate the data held by the generator.
+PASS_THROUGH_EVENTS = {
+    'MOUSEMOVE', 'INBETWEEN_MOUSEMOVE', 'MIDDLEMOUSE',
+    'WHEELUPMOUSE', 'WHEELDOWNMOUSE', 'WHEELINMOUSE', 'WHEELOUTMOUSE',
+    'TRACKPADPAN', 'TRACKPADZOOM', 'MOUSEROTATE', 'NDOF_MOTION',
+    'WINDOW_DEACTIVATE', 'TIMER_REPORT', 'TIMERREGION',
+}
+
+
+class ModalSteps:
+    "Operator mixin running a work generator in time-sliced chunks on a timer"
+
+    progress_text = "Processing"
+    progress_unit = "steps"
+    time_slice = 0.2
+    max_time_slice = 1.0
+    max_overhead = 0.03
+    timer_interval = 0.001
+
+    def run_modal(self, context, steps):
+        # Only interactive calls go modal, scripted bpy.ops calls must finish before returning
+        if not self.options.is_invoke or context.window is None:
+            return run_steps(context, steps)
+
+        try:
+            self._progress = next(steps)
+        except StopIteration as e:
+            return e.value
+
+        self._steps = steps
+        self._start_time = perf_counter()
+        self._slice_end = self._start_time
+        self._idle_time = 0.0
+        self._time_slice = self.time_slice
+
+        wm = context.window_manager
+        wm.progress_begin(0, 1)
+        self._timer = wm.event_timer_add(self.timer_interval, window=context.window)
+        wm.modal_handler_add(self)
+        self.update_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            try:
+                self._steps.close()
+            finally:
+                self.finish_modal(context)
+            self.report({'WARNING'}, f"{self.progress_text} cancelled")
+            return {'CANCELLED'}
+
+        if event.type in PASS_THROUGH_EVENTS:
+            return {'PASS_THROUGH'}
+
+        if event.type != 'TIMER':
+            return {'RUNNING_MODAL'}
+
+        # Time between slices (timer wait, redraw, passed through events) is overhead compared
+        # to run_steps. Grow the slice until that gap stays within max_overhead of the work.
+        slice_start = perf_counter()
+        gap = slice_start - self._slice_end
+        self._idle_time += gap
+        self._time_slice = min(max(self._time_slice, gap / self.max_overhead), self.max_time_slice)
+
+        deadline = slice_start + self._time_slice
+        try:
+            while perf_counter() < deadline:
+                self._progress = self._steps.send(context)
+        except StopIteration as e:
+            self.finish_modal(context)
+            total_time = perf_counter() - self._start_time
+            self.report({'INFO'}, f"{self.progress_text} finished in {total_time:.1f}s, "
+                                  f"{self._idle_time / total_time:.1%} of it outside the work")
+            return e.value
+        except Exception:
+            try:
+                self._steps.close()
+            finally:
+                self.finish_modal(context)
+            raise
+
+        self._slice_end = perf_counter()
+        self.update_progress(context)
+        return {'RUNNING_MODAL'}
+
+    def update_progress(self, context):
+        done, total = self._progress
+        context.window_manager.progress_update(done / total if total else 0)
+
+        text = f"{self.progress_text}: {done}/{total} {self.progress_unit}"
+        if done:
+            eta = (perf_counter() - self._start_time) / done * (total - done)
+            text += f", ETA {eta:.0f}s"
+        context.workspace.status_text_set(text + " (Esc to cancel)")
+
+    def finish_modal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)